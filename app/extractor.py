@@ -4,6 +4,7 @@ from bs4 import BeautifulSoup, Tag
 import json
 
 from app.homework import Homework, HomeworkType, Section
+from app.snapshot import snapshot_path, source_stamp, write_snapshot
 
 """
 {
@@ -69,6 +70,11 @@ class Extrator:
       with open(self.writing, "w", encoding='utf-8') as fp:
          json.dump(writeable, fp, indent=2)
 
+      try:
+         write_snapshot(self.content, snapshot_path(self.writing), source_stamp(self.writing))
+      except (OSError, ValueError):
+         pass
+
    def extract(self):
       valid_classes = ['example', 'practice', 'level1', 'answersetdiv']
 
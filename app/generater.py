@@ -1,7 +1,8 @@
-from typing import List, Dict
+from typing import List, Dict, Mapping
 from pathlib import Path
 import json
 from app.homework import Homework, HomeworkType, Section
+from app.snapshot import Snapshot, SectionView, snapshot_path, source_stamp, write_snapshot
 import subprocess
 from bs4 import BeautifulSoup
 
@@ -46,7 +47,7 @@ HWSelection = Dict[HomeworkType, List[int]]
 class Generator:
    selection: Dict[str, HWSelection]
 
-   sections: Dict[str, Section]
+   sections: Dict[str, Section | SectionView]
    problems: Dict[str, Homework]
    answers: Dict[str, str]
    references: Dict[int, str]
@@ -54,6 +55,7 @@ class Generator:
 
    reading: Path
    writing: Path
+   snapshot: Snapshot | None = None
 
    answering: bool = False
 
@@ -63,15 +65,16 @@ class Generator:
       self.writing.parent.touch()
       self.selection = selection
 
-      self.load_selected()
-      self.establish_keymaps()
+      try:
+         self.load_selected()
+         self.establish_keymaps()
+      finally:
+         self.release_snapshot()
    
    def load_selected(self):
-      with open(self.reading, "r", encoding='utf-8') as fp:
-         homework = json.load(fp)
-         data = { str(k): Section.from_dict(v) for k, v in homework.items() }
+      data = self.open_snapshot()
       
-      selection: Dict[str, Section] = {}
+      selection: Dict[str, Section | SectionView] = {}
 
       for item in self.selection.keys():
          if item in data.keys():
@@ -79,6 +82,42 @@ class Generator:
       
       self.sections = selection
 
+   def open_snapshot(self) -> Mapping[str, Section | SectionView]:
+      snapshot = snapshot_path(self.reading)
+      stamp = source_stamp(self.reading)
+
+      try:
+         self.snapshot = Snapshot(snapshot)
+      except (OSError, ValueError):
+         self.snapshot = None
+
+      if self.snapshot is not None:
+         if self.snapshot.source == stamp:
+            return self.snapshot
+
+         self.snapshot.close()
+         self.snapshot = None
+
+      with open(self.reading, "r", encoding='utf-8') as fp:
+         homework = json.load(fp)
+         data = { str(k): Section.from_dict(v) for k, v in homework.items() }
+
+      try:
+         write_snapshot(data, snapshot, stamp)
+      except (OSError, ValueError):
+         pass
+
+      return data
+
+   def release_snapshot(self):
+      # Sections may be views over the mapping; the keymaps hold everything
+      # that is needed once they are built.
+      self.sections = {}
+
+      if self.snapshot is not None:
+         self.snapshot.close()
+         self.snapshot = None
+
    def establish_keymaps(self):
       problems: Dict[str, Homework] = {}
       answers: Dict[str, str] = {}
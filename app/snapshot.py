@@ -0,0 +1,291 @@
+import mmap
+import struct
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from app.homework import Homework, HomeworkType, Section
+
+"""
+Binary snapshot of the problem database, written next to `problems.json`.
+
+   header    MAGIC, version, section count, item count, file size, source size, source mtime
+   sections  (name offset, name length, first item, item count) sorted by name
+   items     (kind, number, refr, blob offset, blob length) sorted by (kind, number)
+   blobs     raw UTF-8 for section names, html and answers
+
+The file is opened through `mmap`; tables are read in place with
+`struct.unpack_from` and a `Homework` is only built when it is looked up.
+"""
+
+MAGIC = b'HWSNAP\0\0'
+VERSION = 3
+SUFFIX = '.snap'
+
+_HEADER = struct.Struct('<8sIIIQQQ')
+_SECTION = struct.Struct('<QIII')
+_ITEM = struct.Struct('<BiiQI')
+
+_NO_REFR = -1
+_INT32 = range(-2**31, 2**31)
+_UINT32 = range(2**32)
+
+#: Item kinds, in on-disk sort order.
+_KINDS: List[Tuple[str, str]] = [
+   ('problem', 'problems'),
+   ('example', 'examples'),
+   ('reference', 'references'),
+   ('problem', 'answers'),
+   ('example', 'answers'),
+]
+_FOLDER_KIND: Dict[HomeworkType, int] = { 'problem': 0, 'example': 1, 'reference': 2 }
+_ANSWER_KIND: Dict[HomeworkType, int] = { 'problem': 3, 'example': 4 }
+
+
+def snapshot_path(database: str | Path) -> Path:
+   return Path(database).with_suffix(SUFFIX)
+
+
+def source_stamp(source: str | Path) -> Tuple[int, int]:
+   stat = Path(source).stat()
+   return stat.st_size, stat.st_mtime_ns
+
+
+def _check(value: int, bounds: range, what: str) -> int:
+   if value not in bounds:
+      raise ValueError(f"{what} {value} does not fit in a homework snapshot")
+
+   return value
+
+
+def write_snapshot(sections: Dict[str, Section], writing: str | Path, stamp: Tuple[int, int]) -> Path:
+   names = sorted(sections.keys(), key=lambda name: name.encode('utf-8'))
+
+   section_rows: List[Tuple[bytes, int, int]] = []
+   item_rows: List[Tuple[int, int, int, bytes]] = []
+
+   for name in names:
+      section = sections[name]
+      first = len(item_rows)
+
+      unknown = [ kind for kind, answers in section.answers.items() if answers and kind not in _ANSWER_KIND ]
+      if unknown:
+         raise ValueError(f"section {name} has answers of unsupported kind {unknown[0]!r}")
+
+      for kind, (hw_type, attr) in enumerate(_KINDS):
+         if attr == 'answers':
+            folder = section.answers.get(hw_type, {})
+            for number in sorted(folder):
+               _check(number, _INT32, 'answer number')
+               item_rows.append((kind, number, _NO_REFR, folder[number].encode('utf-8')))
+         else:
+            folder = getattr(section, attr)
+            for number in sorted(folder):
+               item = folder[number]
+               refr = _NO_REFR if item.refr is None else _check(item.refr, range(2**31), 'reference')
+               _check(number, _INT32, f'{hw_type} number')
+               item_rows.append((kind, number, refr, item.html.encode('utf-8')))
+
+      section_rows.append((name.encode('utf-8'), first, len(item_rows) - first))
+
+   blob_start = _HEADER.size + _SECTION.size * len(section_rows) + _ITEM.size * len(item_rows)
+   blobs = bytearray()
+
+   def place(data: bytes) -> int:
+      offset = blob_start + len(blobs)
+      blobs.extend(data)
+      return offset
+
+   _check(len(section_rows), _UINT32, 'section count')
+   _check(len(item_rows), _UINT32, 'item count')
+   table = bytearray()
+
+   for name, first, count in section_rows:
+      table += _SECTION.pack(place(name), _check(len(name), _UINT32, 'name length'), first, count)
+
+   for kind, number, refr, data in item_rows:
+      table += _ITEM.pack(kind, number, refr, place(data), _check(len(data), _UINT32, 'blob length'))
+
+   size, mtime = stamp
+   total = _HEADER.size + len(table) + len(blobs)
+   header = _HEADER.pack(MAGIC, VERSION, len(section_rows), len(item_rows), total, size, mtime)
+
+   path = Path(writing)
+   tmp = path.with_suffix(path.suffix + '.tmp')
+
+   try:
+      with open(tmp, "wb") as fp:
+         fp.write(header)
+         fp.write(table)
+         fp.write(blobs)
+
+      tmp.replace(path)
+   except BaseException:
+      tmp.unlink(missing_ok=True)
+      raise
+
+   return path
+
+
+class Snapshot(Mapping[str, 'SectionView']):
+   reading: Path
+   buffer: mmap.mmap
+   view: memoryview
+
+   section_count: int
+   item_count: int
+   source: Tuple[int, int]
+
+   def __init__(self, reading: str | Path) -> None:
+      self.reading = Path(reading).resolve()
+
+      with open(self.reading, "rb") as fp:
+         self.buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+      self.view = memoryview(self.buffer)
+
+      if len(self.buffer) < _HEADER.size:
+         self.close()
+         raise ValueError(f"{self.reading} is not a homework snapshot")
+
+      magic, version, self.section_count, self.item_count, total, *source = _HEADER.unpack_from(self.buffer, 0)
+      self.source = (source[0], source[1])
+
+      if magic != MAGIC or version != VERSION:
+         self.close()
+         raise ValueError(f"{self.reading} is not a version {VERSION} homework snapshot")
+
+      self._items_start = _HEADER.size + _SECTION.size * self.section_count
+
+      if total != len(self.buffer) or self._items_start + _ITEM.size * self.item_count > total:
+         self.close()
+         raise ValueError(f"{self.reading} is truncated")
+
+   def close(self):
+      self.view.release()
+      self.buffer.close()
+
+   def _text(self, offset: int, length: int) -> str:
+      with self.view[offset:offset + length] as blob:
+         return str(blob, 'utf-8')
+
+   def _item(self, index: int) -> Tuple[int, int, int, int, int]:
+      return _ITEM.unpack_from(self.buffer, self._items_start + index * _ITEM.size)
+
+   def _section(self, index: int) -> Tuple[int, int, int, int]:
+      return _SECTION.unpack_from(self.buffer, _HEADER.size + index * _SECTION.size)
+
+   def _name(self, index: int) -> bytes:
+      offset, length, _, _ = self._section(index)
+      return self.buffer[offset:offset + length]
+
+   def __getitem__(self, name: str) -> 'SectionView':
+      key = name.encode('utf-8')
+      lo, hi = 0, self.section_count
+
+      while lo < hi:
+         mid = (lo + hi) // 2
+         if self._name(mid) < key: lo = mid + 1
+         else: hi = mid
+
+      if lo < self.section_count and self._name(lo) == key:
+         _, _, first, count = self._section(lo)
+         return SectionView(self, first, first + count)
+
+      raise KeyError(name)
+
+   def __iter__(self) -> Iterator[str]:
+      for index in range(self.section_count):
+         yield self._name(index).decode('utf-8')
+
+   def __len__(self) -> int:
+      return self.section_count
+
+
+class FolderView(Mapping[int, Homework]):
+   """Items of one kind in a section, materialized on lookup."""
+
+   snapshot: Snapshot
+   start: int
+   stop: int
+
+   def __init__(self, snapshot: Snapshot, kind: int, start: int, stop: int) -> None:
+      self.snapshot = snapshot
+      self.kind = kind
+
+      lo = self._bisect(kind, start, stop)
+      self.start = lo
+      self.stop = self._bisect(kind + 1, lo, stop)
+
+   def _bisect(self, kind: int, lo: int, hi: int, number: int | None = None) -> int:
+      while lo < hi:
+         mid = (lo + hi) // 2
+         k, n, *_ = self.snapshot._item(mid)
+         if (k, n) < (kind, number if number is not None else -2**31): lo = mid + 1
+         else: hi = mid
+
+      return lo
+
+   def _find(self, number: int) -> Tuple[int, int, int, int, int] | None:
+      if not isinstance(number, int): return None
+
+      index = self._bisect(self.kind, self.start, self.stop, number)
+      if index >= self.stop: return None
+
+      record = self.snapshot._item(index)
+      return record if record[1] == number else None
+
+   def _build(self, record: Tuple[int, int, int, int, int]):
+      _, _, refr, offset, length = record
+      html = self.snapshot._text(offset, length)
+      return Homework(html, None if refr == _NO_REFR else refr)
+
+   def __getitem__(self, number: int):
+      record = self._find(number)
+      if record is None:
+         raise KeyError(number)
+
+      return self._build(record)
+
+   def __iter__(self) -> Iterator[int]:
+      for index in range(self.start, self.stop):
+         yield self.snapshot._item(index)[1]
+
+   def __len__(self) -> int:
+      return self.stop - self.start
+
+
+class AnswerView(FolderView):
+   def _build(self, record: Tuple[int, int, int, int, int]) -> str:
+      _, _, _, offset, length = record
+      return self.snapshot._text(offset, length)
+
+
+class SectionView:
+   """Read-only stand-in for `Section` backed by a `Snapshot`."""
+
+   examples: FolderView
+   problems: FolderView
+   references: FolderView
+   answers: Dict[HomeworkType, AnswerView]
+
+   def __init__(self, snapshot: Snapshot, start: int, stop: int) -> None:
+      self.problems = FolderView(snapshot, _FOLDER_KIND['problem'], start, stop)
+      self.examples = FolderView(snapshot, _FOLDER_KIND['example'], start, stop)
+      self.references = FolderView(snapshot, _FOLDER_KIND['reference'], start, stop)
+      self.answers = {
+         kind: AnswerView(snapshot, index, start, stop)
+         for kind, index in _ANSWER_KIND.items()
+      }
+
+   def _get_folder(self, hw_type: HomeworkType) -> FolderView:
+      folders: Dict[HomeworkType, FolderView] = {
+         'problem': self.problems,
+         'example': self.examples,
+         'reference': self.references,
+      }
+
+      return folders[hw_type]
+
+   def search_in(self, hw_type: HomeworkType, number: int) -> Homework | None:
+      return self._get_folder(hw_type).get(number)
@@ -0,0 +1,102 @@
+import json
+import os
+
+import pytest
+
+from app import generater
+from app.generater import Generator
+from app.homework import Homework, Section
+from app.snapshot import snapshot_path
+
+SELECTED = {
+   '1.1': { 'problem': [1, 3], 'example': [2] },
+   '2.1': { 'problem': [4] },
+}
+
+
+def build_database(html: str = '<p>3</p>') -> dict:
+   first = Section()
+   first.append_to('problem', Homework('<p>é 1</p>', 1), 1)
+   first.append_to('problem', Homework(html, None), 3)
+   first.append_to('example', Homework('<p>ex</p>', None), 2)
+   first.append_to('reference', Homework('<div>ref</div>', None), 1)
+   first.answers['problem'][3] = '<li>ans</li>'
+   first.answers['example'][2] = '<section>sol</section>'
+
+   second = Section()
+   second.append_to('problem', Homework('<p>4</p>', None), 4)
+
+   return { '1.1': first.to_dict(), '2.1': second.to_dict(), '3.1': Section().to_dict() }
+
+
+@pytest.fixture
+def database(tmp_path):
+   path = tmp_path / 'problems.json'
+   path.write_text(json.dumps(build_database()), encoding='utf-8')
+   return path
+
+
+def generate(database) -> Generator:
+   return Generator(str(database), str(database.parent / 'homework.pdf'), SELECTED)
+
+
+def keymaps(gen: Generator) -> tuple:
+   problems = { label: item.to_dict() for label, item in gen.problems.items() }
+   return problems, gen.answers, gen.references, gen.hw_types
+
+
+def forbid_json(monkeypatch):
+   def load(*_):
+      raise AssertionError("problems.json was parsed")
+
+   monkeypatch.setattr(generater.json, 'load', load)
+
+
+def test_snapshot_matches_json(database, monkeypatch):
+   from_json = generate(database)
+   assert snapshot_path(database).exists()
+
+   forbid_json(monkeypatch)
+   from_snapshot = generate(database)
+
+   assert keymaps(from_snapshot) == keymaps(from_json)
+   assert from_snapshot.problems['1.1.3'].html == '<p>3</p>'
+   assert from_snapshot.snapshot is None
+
+
+def test_rebuilds_stale_snapshot(database):
+   generate(database)
+   snapshot = snapshot_path(database)
+   stat = snapshot.stat()
+
+   database.write_text(json.dumps(build_database('EDITED')), encoding='utf-8')
+   os.utime(database, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+   assert generate(database).problems['1.1.3'].html == 'EDITED'
+
+
+@pytest.mark.parametrize('damage', [
+   lambda data: b'',
+   lambda data: data[:-2],
+   lambda data: data[:8] + b'\xff' + data[9:],
+])
+def test_rebuilds_damaged_snapshot(database, monkeypatch, damage):
+   expected = keymaps(generate(database))
+   snapshot = snapshot_path(database)
+   snapshot.write_bytes(damage(snapshot.read_bytes()))
+
+   assert keymaps(generate(database)) == expected
+
+   forbid_json(monkeypatch)
+   assert keymaps(generate(database)) == expected
+
+
+def test_falls_back_when_write_fails(database, monkeypatch):
+   def write_snapshot(*_):
+      raise PermissionError("read-only")
+
+   monkeypatch.setattr(generater, 'write_snapshot', write_snapshot)
+
+   gen = generate(database)
+   assert gen.problems['1.1.3'].html == '<p>3</p>'
+   assert not snapshot_path(database).exists()
@@ -0,0 +1,101 @@
+import pytest
+
+from app.homework import Homework, Section
+from app.snapshot import Snapshot, snapshot_path, source_stamp, write_snapshot
+
+
+def build_sections():
+   section = Section()
+   section.append_to('problem', Homework('<p>é 1</p>', 1), 1)
+   section.append_to('problem', Homework('<p>3</p>', None), 3)
+   section.append_to('example', Homework('<p>ex</p>', None), 2)
+   section.append_to('reference', Homework('<div>ref</div>', None), 1)
+   section.answers['problem'][3] = '<li>ans</li>'
+   section.answers['example'][2] = '<section>sol</section>'
+
+   partial = Section()
+   partial.append_to('problem', Homework('<p>only</p>', None), 5)
+   partial.answers = { 'problem': { 5: 'five' } }
+
+   return { '2.1': section, '1.10': partial, '10.2': Section(), 'é': Section() }
+
+
+def write(tmp_path, sections):
+   database = tmp_path / 'problems.json'
+   database.write_text('{}', encoding='utf-8')
+   return write_snapshot(sections, snapshot_path(database), source_stamp(database)), database
+
+
+def thaw(view) -> dict:
+   return {
+      'examples': { str(k): v.to_dict() for k, v in view.examples.items() },
+      'problems': { str(k): v.to_dict() for k, v in view.problems.items() },
+      'references': { str(k): v.to_dict() for k, v in view.references.items() },
+      'answers': {
+         kind: { str(k): v for k, v in answers.items() }
+         for kind, answers in view.answers.items()
+      },
+   }
+
+
+def test_round_trip(tmp_path):
+   sections = build_sections()
+   path, database = write(tmp_path, sections)
+
+   snapshot = Snapshot(path)
+   assert sorted(snapshot) == sorted(sections)
+   assert snapshot.source == source_stamp(database)
+
+   for name, section in sections.items():
+      expected = section.to_dict()
+      expected['answers'].setdefault('example', {})
+      assert thaw(snapshot[name]) == expected
+
+   snapshot.close()
+
+
+def test_lookups(tmp_path):
+   path, _ = write(tmp_path, build_sections())
+   snapshot = Snapshot(path)
+   view = snapshot['2.1']
+
+   assert view.search_in('problem', 1).refr == 1
+   assert view.search_in('problem', 2) is None
+   assert view.search_in('problem', '3') is None
+   assert view.answers['example'].get(2) == '<section>sol</section>'
+   assert snapshot['1.10'].answers['example'].get(5) is None
+   assert len(snapshot['10.2'].problems) == 0
+   assert '9.9' not in snapshot
+
+   snapshot.close()
+
+
+@pytest.mark.parametrize('damage', [
+   lambda data: b'',
+   lambda data: data[:20],
+   lambda data: data[:50],
+   lambda data: data[:-2],
+   lambda data: b'BADMAGIC' + data[8:],
+   lambda data: data[:8] + b'\xff' + data[9:],
+])
+def test_rejects_damaged(tmp_path, damage):
+   path, _ = write(tmp_path, build_sections())
+   path.write_bytes(damage(path.read_bytes()))
+
+   with pytest.raises(ValueError):
+      Snapshot(path)
+
+
+@pytest.mark.parametrize('damage', [
+   lambda section: section.answers.update({ 'remark': { 1: 'dropped' } }),
+   lambda section: section.append_to('problem', Homework('big', None), 2**31),
+   lambda section: section.append_to('problem', Homework('bad', -5), 1),
+])
+def test_rejects_unrepresentable(tmp_path, damage):
+   sections = build_sections()
+   damage(sections['2.1'])
+
+   with pytest.raises(ValueError):
+      write(tmp_path, sections)
+
+   assert list(tmp_path.iterdir()) == [tmp_path / 'problems.json']